@@ -37,6 +37,7 @@ from src.llm_agent import (
     generate_optimized_profile,
     extract_relevant_job_info,
     extract_cv_from_pdf_smart,
+    set_response_cache,
 )
 from src.structure_validator import fix_cv
 from src.renderer import render_cv_pdf_html, render_cv_pdf_memory
@@ -45,13 +46,16 @@ from src.ats_optimizer import (
     validate_ats_structure,
     refine_cv_for_ats,
 )
-from src.rag_system import CVRAGSystem, RAGEnhancedGenerator
+from src.rag_system import prepare_rag_generation
 
 # Import backend routes and dependencies
 from backend.routes import router as backend_router
 from backend.auth import get_current_user, get_optional_user
 from backend.profile_service import ProfileService
 
+# Multi-user server: never persist users' CVs/profiles in the LLM response cache
+set_response_cache(False)
+
 # Initialize FastAPI app with settings from config
 app = FastAPI(
     title=settings.API_TITLE,
@@ -381,17 +385,14 @@ async def generate_cv(request: GenerateCVRequest):
     try:
         profile_dict = request.profile.model_dump()
         
-        job_info = extract_relevant_job_info(
-            request.job_description, 
-            request.model_name
+        # Extract job info while the profile is indexed for RAG
+        job_info, rag_generator = prepare_rag_generation(
+            profile=profile_dict,
+            job_text=request.job_description,
+            extract_function=extract_relevant_job_info,
+            model_name=request.model_name
         )
         
-        rag_system = CVRAGSystem()
-        rag_system.reset_database()
-        rag_system.index_profile(profile_dict)
-        
-        rag_generator = RAGEnhancedGenerator(rag_system)
-        
         optimized_profile = rag_generator.generate_optimized_profile_with_rag(
             profile=profile_dict,
             job_info=job_info,
@@ -446,19 +447,14 @@ async def generate_cv_from_file(request: GenerateCVFromFileRequest):
         # Load profile from file
         profile_dict = load_profile(request.profile_path)
         
-        # Extract job information
-        job_info = extract_relevant_job_info(
-            request.job_description, 
-            request.model_name
+        # Extract job info while the profile is indexed for RAG
+        job_info, rag_generator = prepare_rag_generation(
+            profile=profile_dict,
+            job_text=request.job_description,
+            extract_function=extract_relevant_job_info,
+            model_name=request.model_name
         )
         
-        # RAG-enhanced generation
-        rag_system = CVRAGSystem()
-        rag_system.reset_database()
-        rag_system.index_profile(profile_dict)
-        
-        rag_generator = RAGEnhancedGenerator(rag_system)
-        
         optimized_profile = rag_generator.generate_optimized_profile_with_rag(
             profile=profile_dict,
             job_info=job_info,
@@ -531,15 +527,13 @@ async def generate_cv_authenticated(
             
             profile_dict = profile_data["profile_data"]
             
-            # Parse job description
-            job_info = extract_relevant_job_info(request.job_description, request.model_name)
-            
-            # RAG-enhanced generation
-            rag_system = CVRAGSystem()
-            rag_system.reset_database()
-            rag_system.index_profile(profile_dict)
-            
-            rag_generator = RAGEnhancedGenerator(rag_system)
+            # Extract job info while the profile is indexed for RAG
+            job_info, rag_generator = prepare_rag_generation(
+                profile=profile_dict,
+                job_text=request.job_description,
+                extract_function=extract_relevant_job_info,
+                model_name=request.model_name
+            )
             
             optimized_profile = rag_generator.generate_optimized_profile_with_rag(
                 profile=profile_dict,
@@ -611,13 +605,13 @@ async def generate_cv_from_url(request: GenerateCVFromURLRequest):
         
         profile_dict = request.profile.model_dump()
         
-        job_info = extract_relevant_job_info(job_text, request.model_name)
-        
-        rag_system = CVRAGSystem()
-        rag_system.reset_database()
-        rag_system.index_profile(profile_dict)
-        
-        rag_generator = RAGEnhancedGenerator(rag_system)
+        # Extract job info while the profile is indexed for RAG
+        job_info, rag_generator = prepare_rag_generation(
+            profile=profile_dict,
+            job_text=job_text,
+            extract_function=extract_relevant_job_info,
+            model_name=request.model_name
+        )
         
         optimized_profile = rag_generator.generate_optimized_profile_with_rag(
             profile=profile_dict,
@@ -695,15 +689,13 @@ async def generate_cv_authenticated_from_url(
                     detail="Failed to fetch job description from URL"
                 )
             
-            # Parse job description
-            job_info = extract_relevant_job_info(job_text, request.model_name)
-            
-            # RAG-enhanced generation
-            rag_system = CVRAGSystem()
-            rag_system.reset_database()
-            rag_system.index_profile(profile_dict)
-            
-            rag_generator = RAGEnhancedGenerator(rag_system)
+            # Extract job info while the profile is indexed for RAG
+            job_info, rag_generator = prepare_rag_generation(
+                profile=profile_dict,
+                job_text=job_text,
+                extract_function=extract_relevant_job_info,
+                model_name=request.model_name
+            )
             
             optimized_profile = rag_generator.generate_optimized_profile_with_rag(
                 profile=profile_dict,
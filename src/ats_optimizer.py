@@ -9,149 +9,261 @@ Helps improve Applicant Tracking System scores and ensures maximum compatibility
 Philosophy: Don't give users a bad CV with suggestions - give them a PERFECT CV!
 """
 
+import copy
+import io
 import json
 import re
+import sys
+import numpy as np
+import orjson
 import replicate
-from typing import Dict, List, Tuple, Any
-
-
-def expand_abbreviations(text: str) -> str:
+from functools import lru_cache
+from typing import Dict, List, Tuple, Any, Optional, Set, Iterable
+
+
+# Comprehensive tech abbreviations (60+ terms for maximum ATS scores)
+_ABBREVIATIONS = {
+    # AI/ML
+    'ML': 'Machine Learning (ML)',
+    'AI': 'Artificial Intelligence (AI)', 
+    'LLM': 'Large Language Model (LLM)',
+    'LLMs': 'Large Language Models (LLMs)',
+    'NLP': 'Natural Language Processing (NLP)',
+    'CV': 'Computer Vision (CV)',
+    'DL': 'Deep Learning (DL)',
+    'RL': 'Reinforcement Learning (RL)',
+    'CNN': 'Convolutional Neural Network (CNN)',
+    'RNN': 'Recurrent Neural Network (RNN)',
+    'GAN': 'Generative Adversarial Network (GAN)',
+    'VLA': 'Vision-Language-Action (VLA)',
+    
+    # Web/API
+    'API': 'Application Programming Interface (API)',
+    'REST': 'RESTful API',
+    'RESTful': 'RESTful API',
+    'CRUD': 'Create, Read, Update, Delete (CRUD)',
+    'SPA': 'Single Page Application (SPA)',
+    'PWA': 'Progressive Web Application (PWA)',
+    'SSR': 'Server-Side Rendering (SSR)',
+    'CSR': 'Client-Side Rendering (CSR)',
+    'GraphQL': 'GraphQL API',
+    'JSON': 'JavaScript Object Notation (JSON)',
+    'XML': 'Extensible Markup Language (XML)',
+    'HTTP': 'HyperText Transfer Protocol (HTTP)',
+    'HTTPS': 'Secure HTTP (HTTPS)',
+    
+    # Frontend
+    'HTML': 'HyperText Markup Language (HTML)',
+    'CSS': 'Cascading Style Sheets (CSS)',
+    'JS': 'JavaScript (JS)',
+    'TS': 'TypeScript (TS)',
+    'DOM': 'Document Object Model (DOM)',
+    'AJAX': 'Asynchronous JavaScript and XML (AJAX)',
+    
+    # DevOps/Cloud
+    'CI/CD': 'Continuous Integration/Continuous Deployment (CI/CD)',
+    'AWS': 'Amazon Web Services (AWS)',
+    'GCP': 'Google Cloud Platform (GCP)',
+    'Azure': 'Microsoft Azure',
+    'K8s': 'Kubernetes (K8s)',
+    'IaC': 'Infrastructure as Code (IaC)',
+    'EC2': 'AWS EC2',
+    'S3': 'AWS S3',
+    'EKS': 'AWS Elastic Kubernetes Service (EKS)',
+    
+    # Databases
+    'SQL': 'Structured Query Language (SQL)',
+    'NoSQL': 'NoSQL Database',
+    'ORM': 'Object-Relational Mapping (ORM)',
+    'RDBMS': 'Relational Database Management System (RDBMS)',
+    'DB': 'Database (DB)',
+    
+    # Mobile
+    'iOS': 'iOS (Apple)',
+    'APK': 'Android Package (APK)',
+    
+    # Robotics
+    'ROS': 'Robot Operating System (ROS)',
+    'SLAM': 'Simultaneous Localization and Mapping (SLAM)',
+    'IoT': 'Internet of Things (IoT)',
+    
+    # Testing
+    'QA': 'Quality Assurance (QA)',
+    'TDD': 'Test-Driven Development (TDD)',
+    'BDD': 'Behavior-Driven Development (BDD)',
+    'UAT': 'User Acceptance Testing (UAT)',
+    
+    # Data
+    'ETL': 'Extract, Transform, Load (ETL)',
+    'BI': 'Business Intelligence (BI)',
+    'EDA': 'Exploratory Data Analysis (EDA)',
+    
+    # General
+    'SDK': 'Software Development Kit (SDK)',
+    'IDE': 'Integrated Development Environment (IDE)',
+    'CLI': 'Command Line Interface (CLI)',
+    'GUI': 'Graphical User Interface (GUI)',
+    'UI': 'User Interface (UI)',
+    'UX': 'User Experience (UX)',
+    'MVP': 'Minimum Viable Product (MVP)',
+    'POC': 'Proof of Concept (POC)',
+    'SaaS': 'Software as a Service (SaaS)',
+    'PaaS': 'Platform as a Service (PaaS)',
+    'IaaS': 'Infrastructure as a Service (IaaS)',
+}
+
+# Any standalone abbreviation not already in parentheses, matched in one scan:
+# not preceded by '(' and not followed by ')' (already part of expanded form).
+# Longest first so e.g. 'LLMs' is tried before 'LLM'.
+_ABBR_RE = re.compile(
+    r'(?<!\()\b('
+    + '|'.join(re.escape(abbr) for abbr in sorted(_ABBREVIATIONS, key=len, reverse=True))
+    + r')\b(?!\))'
+)
+
+# Leading word of every abbreviation ('CI' for 'CI/CD'), for a cheap presence prefilter
+_TOKEN_RE = re.compile(r'\w+')
+_ABBR_ANCHORS = frozenset(_TOKEN_RE.match(abbr).group() for abbr in _ABBREVIATIONS)
+
+# Abbreviations whose full form is produced by expanding an earlier one
+# (e.g. 'REST' -> 'RESTful API' already covers 'RESTful')
+_ABBR_COVERS = {
+    abbr: {other for other in list(_ABBREVIATIONS)[i + 1:] if _ABBREVIATIONS[other] in full}
+    for i, (abbr, full) in enumerate(_ABBREVIATIONS.items())
+}
+
+# Malformed CI/CD double expansion produced by earlier passes
+_CICD_DOUBLE_EXPANSION_RE = re.compile(
+    r'Continuous Integration/Continuous Deployment \(Continuous Integration \(CI\)/Continuous Deployment \(CD\)\)'
+)
+
+# Whitespace-separated run of words, e.g. "Machine Learning"
+_WORDS_RE = re.compile(r'\w+(?:\s+\w+)*')
+
+
+def expand_abbreviations(text: str, expanded: Optional[Set[str]] = None) -> str:
     """
     Expand common tech abbreviations to full terms for MAXIMUM ATS compatibility.
     Handles already-expanded forms intelligently to avoid double expansion.
     
     Args:
         text: Text to expand
+        expanded: Optional set of abbreviations already expanded (or already present
+            in full form) elsewhere in the same document. Updated in place so that
+            several fragments of one CV only get the first occurrence expanded.
         
     Returns:
         Text with abbreviations expanded
     """
-    import re
-    
-    # Comprehensive tech abbreviations (60+ terms for maximum ATS scores)
-    abbreviations = {
-        # AI/ML
-        'ML': 'Machine Learning (ML)',
-        'AI': 'Artificial Intelligence (AI)', 
-        'LLM': 'Large Language Model (LLM)',
-        'LLMs': 'Large Language Models (LLMs)',
-        'NLP': 'Natural Language Processing (NLP)',
-        'CV': 'Computer Vision (CV)',
-        'DL': 'Deep Learning (DL)',
-        'RL': 'Reinforcement Learning (RL)',
-        'CNN': 'Convolutional Neural Network (CNN)',
-        'RNN': 'Recurrent Neural Network (RNN)',
-        'GAN': 'Generative Adversarial Network (GAN)',
-        'VLA': 'Vision-Language-Action (VLA)',
-        
-        # Web/API
-        'API': 'Application Programming Interface (API)',
-        'REST': 'RESTful API',
-        'RESTful': 'RESTful API',
-        'CRUD': 'Create, Read, Update, Delete (CRUD)',
-        'SPA': 'Single Page Application (SPA)',
-        'PWA': 'Progressive Web Application (PWA)',
-        'SSR': 'Server-Side Rendering (SSR)',
-        'CSR': 'Client-Side Rendering (CSR)',
-        'GraphQL': 'GraphQL API',
-        'JSON': 'JavaScript Object Notation (JSON)',
-        'XML': 'Extensible Markup Language (XML)',
-        'HTTP': 'HyperText Transfer Protocol (HTTP)',
-        'HTTPS': 'Secure HTTP (HTTPS)',
-        
-        # Frontend
-        'HTML': 'HyperText Markup Language (HTML)',
-        'CSS': 'Cascading Style Sheets (CSS)',
-        'JS': 'JavaScript (JS)',
-        'TS': 'TypeScript (TS)',
-        'DOM': 'Document Object Model (DOM)',
-        'AJAX': 'Asynchronous JavaScript and XML (AJAX)',
-        
-        # DevOps/Cloud
-        'CI/CD': 'Continuous Integration/Continuous Deployment (CI/CD)',
-        'AWS': 'Amazon Web Services (AWS)',
-        'GCP': 'Google Cloud Platform (GCP)',
-        'Azure': 'Microsoft Azure',
-        'K8s': 'Kubernetes (K8s)',
-        'IaC': 'Infrastructure as Code (IaC)',
-        'EC2': 'AWS EC2',
-        'S3': 'AWS S3',
-        'EKS': 'AWS Elastic Kubernetes Service (EKS)',
-        
-        # Databases
-        'SQL': 'Structured Query Language (SQL)',
-        'NoSQL': 'NoSQL Database',
-        'ORM': 'Object-Relational Mapping (ORM)',
-        'RDBMS': 'Relational Database Management System (RDBMS)',
-        'DB': 'Database (DB)',
-        
-        # Mobile
-        'iOS': 'iOS (Apple)',
-        'APK': 'Android Package (APK)',
-        
-        # Robotics
-        'ROS': 'Robot Operating System (ROS)',
-        'SLAM': 'Simultaneous Localization and Mapping (SLAM)',
-        'IoT': 'Internet of Things (IoT)',
-        
-        # Testing
-        'QA': 'Quality Assurance (QA)',
-        'TDD': 'Test-Driven Development (TDD)',
-        'BDD': 'Behavior-Driven Development (BDD)',
-        'UAT': 'User Acceptance Testing (UAT)',
-        
-        # Data
-        'ETL': 'Extract, Transform, Load (ETL)',
-        'BI': 'Business Intelligence (BI)',
-        'EDA': 'Exploratory Data Analysis (EDA)',
-        
-        # General
-        'SDK': 'Software Development Kit (SDK)',
-        'IDE': 'Integrated Development Environment (IDE)',
-        'CLI': 'Command Line Interface (CLI)',
-        'GUI': 'Graphical User Interface (GUI)',
-        'UI': 'User Interface (UI)',
-        'UX': 'User Experience (UX)',
-        'MVP': 'Minimum Viable Product (MVP)',
-        'POC': 'Proof of Concept (POC)',
-        'SaaS': 'Software as a Service (SaaS)',
-        'PaaS': 'Platform as a Service (PaaS)',
-        'IaaS': 'Infrastructure as a Service (IaaS)',
-    }
+    # Nothing to expand in empty or whitespace-only fragments
+    if len(text) < 2 or text.isspace():
+        return text
+    
+    # Standalone calls are memoized (the same text is often expanded again)
+    if expanded is None:
+        return _expand_abbreviations_memo(text)
     
     # First, clean up any malformed double expansions
     # e.g., "Continuous Integration/Continuous Deployment (Continuous Integration (CI)/Continuous Deployment (CD))"
     # Should become: "Continuous Integration/Continuous Deployment (CI/CD)"
-    text = re.sub(
-        r'Continuous Integration/Continuous Deployment \(Continuous Integration \(CI\)/Continuous Deployment \(CD\)\)',
-        'Continuous Integration/Continuous Deployment (CI/CD)',
-        text
-    )
+    text = _CICD_DOUBLE_EXPANSION_RE.sub('Continuous Integration/Continuous Deployment (CI/CD)', text)
     
     # Clean up other nested parentheses patterns
-    text = re.sub(
-        r'(\w+(?:\s+\w+)*)\s+\(\1\s+\(([^)]+)\)\)',
-        r'\1 (\2)',
-        text
-    )
+    text = _collapse_nested_parens(text)
+    
+    # Skip the scan when no abbreviation occurs as a word in the text at all
+    if _ABBR_ANCHORS.isdisjoint(_TOKEN_RE.findall(text)):
+        return text
     
-    # Now expand standalone abbreviations
-    for abbr, full in abbreviations.items():
+    # Now expand standalone abbreviations in a single scan
+    def _replace(match: re.Match) -> str:
+        abbr = match.group(1)
+        
+        # Only the first standalone occurrence is expanded
+        if abbr in expanded:
+            return abbr
+        expanded.add(abbr)
+        
         # Skip if the full form already exists in text
+        full = _ABBREVIATIONS[abbr]
         if full in text:
-            continue
+            return abbr
+        
+        expanded.update(_ABBR_COVERS[abbr])
+        return full
+    
+    return _ABBR_RE.sub(_replace, text)
+
+
+def _collapse_nested_parens(text: str) -> str:
+    """
+    Rewrite malformed double expansions "X (X (Y))" to "X (Y)".
+    
+    Single left-to-right scan over the parentheses instead of a backreference
+    regex, which backtracks quadratically on long texts with many parentheses.
+    """
+    if '))' not in text:
+        return text
+    
+    chunks = []
+    last = 0
+    close = -1
+    outer = text.find('(')
+    
+    while outer != -1:
+        inner = text.find('(', outer + 1)
+        if inner == -1:
+            break
+        
+        # First ')' after the outer paren (only ever moves forward)
+        if close < outer:
+            close = text.find(')', outer)
+            if close == -1:
+                break
         
-        # Pattern to match standalone abbreviation not already in parentheses
-        # Negative lookbehind: not preceded by '('
-        # Negative lookahead: not followed by ')' or already part of expanded form
-        pattern = r'(?<!\()\b' + re.escape(abbr) + r'\b(?!\))'
+        # Shape must be "(X (Y))" with X made of words only
+        if inner + 1 < close and text.startswith('))', close):
+            words = text[outer + 1:inner]
+            phrase = words.rstrip()
+            head_end = outer
+            while head_end > last and text[head_end - 1].isspace():
+                head_end -= 1
+            
+            # ...and X must also precede the outer paren: "X (X (Y))"
+            if (
+                len(phrase) < len(words)
+                and head_end < outer
+                and _WORDS_RE.fullmatch(phrase)
+                and text.endswith(phrase, last, head_end)
+            ):
+                chunks.append(text[last:head_end])
+                chunks.append(' (')
+                chunks.append(text[inner + 1:close + 1])
+                last = close + 2
+                outer = text.find('(', last)
+                continue
         
-        # Check if abbreviation exists standalone
-        if re.search(pattern, text):
-            # Replace only the first standalone occurrence
-            text = re.sub(pattern, full, text, count=1)
+        outer = inner
     
-    return text
+    if not chunks:
+        return text
+    chunks.append(text[last:])
+    return ''.join(chunks)
+
+
+@lru_cache(maxsize=32)
+def _expand_abbreviations_memo(text: str) -> str:
+    """Memoized expansion of a standalone text (no shared document state)."""
+    return expand_abbreviations(text, set())
+
+
+# CV sections rewarded by the structure score (5 points each), with accepted aliases
+_STRUCTURE_SECTIONS = (
+    ('experience', 'work experience'),
+    ('education',),
+    ('skills',),
+    ('projects', 'portfolio'),
+)
 
 
 def calculate_keyword_density(cv_text: str, job_keywords: List[str]) -> Dict[str, int]:
@@ -165,17 +277,41 @@ def calculate_keyword_density(cv_text: str, job_keywords: List[str]) -> Dict[str
     Returns:
         Dict mapping keyword to occurrence count
     """
-    cv_lower = cv_text.lower()
-    density = {}
+    lower_keywords = [keyword.lower() for keyword in job_keywords]
+    counts = _count_keywords(cv_text.lower(), lower_keywords)
     
-    for keyword in job_keywords:
-        count = cv_lower.count(keyword.lower())
-        density[keyword] = count
+    return {keyword: counts[lk] for keyword, lk in zip(job_keywords, lower_keywords)}
+
+
+@lru_cache(maxsize=32)
+def _keyword_pairs(job_keywords: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """
+    Pair each display keyword with its lowercase search key.
     
-    return density
+    Cached so every refinement iteration (same keyword list, new CV text)
+    reuses the keyword preparation instead of redoing it.
+    """
+    return tuple((keyword, keyword.lower()) for keyword in job_keywords)
+
+
+def _count_keywords(cv_lower: str, lower_keywords: Iterable[str]) -> Dict[str, int]:
+    """
+    Count occurrences of each distinct lowercase keyword in the lowercased CV.
+    
+    Case variants of the same keyword share a single scan. str.count (C fast
+    search) beats a combined alternation regex here: the regex engine tries
+    every alternative at every position. It also beats an n-gram offset index
+    even on large CVs, since building the index in Python costs more than
+    scanning for every keyword.
+    """
+    return {lk: cv_lower.count(lk) for lk in dict.fromkeys(lower_keywords)}
 
 
-def predict_ats_score(cv_text: str, job_keywords: List[str]) -> Dict:
+def predict_ats_score(
+    cv_text: str,
+    job_keywords: List[str],
+    profile: Optional[Dict[str, Any]] = None
+) -> Dict:
     """
     Predict ATS compatibility score (0-100) with advanced analysis.
     
@@ -187,100 +323,197 @@ def predict_ats_score(cv_text: str, job_keywords: List[str]) -> Dict:
     Args:
         cv_text: Full CV text
         job_keywords: Keywords from job posting
+        profile: Optional profile dict cv_text was built from. When given, the
+            structure score is read from its sections instead of scanning the text.
         
     Returns:
         Dict with score, matched/missing keywords, recommendations
     """
+    sections = None
+    if profile is not None:
+        sections = tuple(
+            any(profile.get(key) for key in aliases)
+            for aliases in _STRUCTURE_SECTIONS
+        )
+    
+    # Copy so callers can't mutate the memoized result
+    return copy.deepcopy(_predict_ats_score_cached(cv_text, tuple(job_keywords), sections))
+
+
+def predict_ats_score_batch(cv_texts: List[str], job_keywords: List[str]) -> List[Dict]:
+    """
+    Predict ATS scores for several CVs against the same job keywords.
+    
+    Gives the same results as calling predict_ats_score on each text, but the
+    keyword counts of all CVs go into one (CVs x keywords) matrix and the score
+    components are computed for every CV at once with NumPy.
+    
+    Args:
+        cv_texts: Full text of each CV
+        job_keywords: Keywords from job posting
+        
+    Returns:
+        List of result dicts (same format as predict_ats_score), one per CV
+    """
+    pairs = _keyword_pairs(tuple(job_keywords))
+    
+    counts = np.zeros((len(cv_texts), len(pairs)), dtype=np.int32)
+    sections = np.zeros((len(cv_texts), len(_STRUCTURE_SECTIONS)), dtype=bool)
+    
+    for row, cv_text in enumerate(cv_texts):
+        cv_lower = cv_text.lower()
+        key_counts = _count_keywords(cv_lower, (lk for _, lk in pairs))
+        counts[row] = [key_counts[lk] for _, lk in pairs]
+        sections[row] = _text_sections(cv_lower)
+    
+    return _score_keyword_counts(pairs, counts, sections)
+
+
+@lru_cache(maxsize=64)
+def _predict_ats_score_cached(
+    cv_text: str,
+    job_keywords: Tuple[str, ...],
+    sections: Optional[Tuple[bool, ...]]
+) -> Dict:
+    """
+    Memoized scoring core of predict_ats_score.
+    
+    Refinement re-scores unchanged CVs (e.g. when the LLM output fails to
+    parse and the previous version is kept), so those calls are free.
+    sections holds one presence flag per _STRUCTURE_SECTIONS entry, or None
+    to detect them from the text.
+    """
+    # str.lower has an ASCII fast path (faster than a str.translate table) and
+    # still folds non-ASCII capitals, which orjson-serialized CVs keep unescaped
     cv_lower = cv_text.lower()
     
-    # Check keyword matches (with synonym awareness)
-    matched = []
-    missing = []
+    # Display keywords paired with their lowercase search keys (lowercased once per run)
+    pairs = _keyword_pairs(job_keywords)
     
-    for keyword in job_keywords:
-        if keyword.lower() in cv_lower:
-            matched.append(keyword)
-        else:
-            missing.append(keyword)
+    # One counting pass serves both the match split and the density score
+    key_counts = _count_keywords(cv_lower, (lk for _, lk in pairs))
+    counts = np.array([[key_counts[lk] for _, lk in pairs]], dtype=np.int32).reshape(1, len(pairs))
+    
+    if sections is None:
+        sections = _text_sections(cv_lower)
+    
+    return _score_keyword_counts(pairs, counts, np.array([sections], dtype=bool))[0]
+
+
+def _text_sections(cv_lower: str) -> Tuple[bool, ...]:
+    """Detect the _STRUCTURE_SECTIONS keys in lowercased CV JSON text."""
+    return tuple(
+        any(f'"{key}"' in cv_lower for key in aliases)
+        for aliases in _STRUCTURE_SECTIONS
+    )
+
+
+def _score_keyword_counts(
+    pairs: Tuple[Tuple[str, str], ...],
+    counts: np.ndarray,
+    sections: np.ndarray
+) -> List[Dict]:
+    """
+    Turn keyword counts into ATS results, one per CV.
+    
+    Args:
+        pairs: (display keyword, search key) per column of counts
+        counts: (CVs x keywords) occurrence counts
+        sections: (CVs x len(_STRUCTURE_SECTIONS)) section presence flags
+    """
+    keywords = [keyword for keyword, _ in pairs]
+    
+    # The density map lists a repeated keyword once (first occurrence)
+    first_seen: Dict[str, int] = {}
+    for i, keyword in enumerate(keywords):
+        first_seen.setdefault(keyword, i)
+    listed_once = np.zeros(len(keywords), dtype=bool)
+    listed_once[list(first_seen.values())] = True
+    
+    # Check keyword matches (with synonym awareness)
+    matched_mask = counts > 0
+    matched_counts = matched_mask.sum(axis=1)
     
     # Calculate base keyword match rate (60% of score)
-    match_rate = len(matched) / len(job_keywords) if job_keywords else 0
-    keyword_score = match_rate * 60
+    if keywords:
+        keyword_scores = matched_counts / len(keywords) * 60
+    else:
+        keyword_scores = np.zeros(len(counts))
     
     # Calculate keyword density score (20% of score)
-    density = calculate_keyword_density(cv_text, matched)
-    optimal_density_count = 0
-    under_represented = []
-    over_represented = []
-    
-    for kw, count in density.items():
-        if 2 <= count <= 5:  # Optimal range
-            optimal_density_count += 1
-        elif count < 2:
-            under_represented.append(kw)
-        elif count > 6:
-            over_represented.append(kw)
-    
-    density_rate = optimal_density_count / len(matched) if matched else 0
-    density_score = density_rate * 20
+    density_mask = matched_mask & listed_once
+    optimal_mask = density_mask & (counts >= 2) & (counts <= 5)  # Optimal range
+    under_mask = density_mask & (counts < 2)
+    over_mask = density_mask & (counts > 6)
+    density_rates = np.divide(
+        optimal_mask.sum(axis=1), matched_counts,
+        out=np.zeros(len(counts)), where=matched_counts > 0
+    )
+    density_scores = density_rates * 20
     
     # Structure score (20% of score) - basic checks
-    structure_score = 0
-    if '"experience"' in cv_lower or '"work experience"' in cv_lower:
-        structure_score += 5
-    if '"education"' in cv_lower:
-        structure_score += 5
-    if '"skills"' in cv_lower:
-        structure_score += 5
-    if '"projects"' in cv_lower or '"portfolio"' in cv_lower:
-        structure_score += 5
-    
-    # Total ATS score
-    total_score = keyword_score + density_score + structure_score
-    
-    # Generate detailed recommendations
-    recommendations = []
-    
-    # Score-based recommendations
-    if total_score >= 90:
-        recommendations.append(f"EXCELLENT ATS score ({total_score:.0f}%). CV will likely pass ATS filters.")
-    elif total_score >= 80:
-        recommendations.append(f"STRONG ATS score ({total_score:.0f}%). Very good chance of passing ATS.")
-    elif total_score >= 70:
-        recommendations.append(f"GOOD ATS score ({total_score:.0f}%). Should pass most ATS systems.")
-    elif total_score >= 60:
-        recommendations.append(f"MODERATE ATS score ({total_score:.0f}%). Consider adding more keywords.")
-    else:
-        recommendations.append(f"LOW ATS score ({total_score:.0f}%). Add missing keywords to improve.")
-    
-    # Missing keywords
-    if missing:
-        critical_missing = missing[:5]
-        recommendations.append(f"Add these critical keywords: {', '.join(critical_missing)}")
-    
-    # Density issues
-    if under_represented:
-        recommendations.append(f"Mention more often (2-5 times ideal): {', '.join(under_represented[:3])}")
-    
-    if over_represented:
-        recommendations.append(f"Mentioned too often (reduce): {', '.join(over_represented[:3])}")
-    
-    # Percentage breakdown
-    recommendations.append(f"\nScore Breakdown: Keywords {keyword_score:.0f}/60 + Density {density_score:.0f}/20 + Structure {structure_score:.0f}/20")
-    
-    return {
-        'score': round(total_score, 1),
-        'keyword_match_score': round(keyword_score, 1),
-        'density_score': round(density_score, 1),
-        'structure_score': round(structure_score, 1),
-        'matched_keywords': matched,
-        'missing_keywords': missing,
-        'keyword_density': density,
-        'optimal_density_keywords': [kw for kw, count in density.items() if 2 <= count <= 5],
-        'under_represented': under_represented,
-        'over_represented': over_represented,
-        'recommendations': recommendations
-    }
+    structure_scores = 5 * sections.sum(axis=1)
+    
+    results = []
+    for row in range(len(counts)):
+        keyword_score = float(keyword_scores[row])
+        density_score = float(density_scores[row])
+        structure_score = int(structure_scores[row])
+        
+        matched = [keywords[i] for i in np.flatnonzero(matched_mask[row])]
+        missing = [keywords[i] for i in np.flatnonzero(~matched_mask[row])]
+        density = {keywords[i]: int(counts[row, i]) for i in np.flatnonzero(density_mask[row])}
+        under_represented = [keywords[i] for i in np.flatnonzero(under_mask[row])]
+        over_represented = [keywords[i] for i in np.flatnonzero(over_mask[row])]
+        
+        # Total ATS score
+        total_score = keyword_score + density_score + structure_score
+        
+        # Generate detailed recommendations
+        recommendations = []
+        
+        # Score-based recommendations
+        if total_score >= 90:
+            recommendations.append(f"EXCELLENT ATS score ({total_score:.0f}%). CV will likely pass ATS filters.")
+        elif total_score >= 80:
+            recommendations.append(f"STRONG ATS score ({total_score:.0f}%). Very good chance of passing ATS.")
+        elif total_score >= 70:
+            recommendations.append(f"GOOD ATS score ({total_score:.0f}%). Should pass most ATS systems.")
+        elif total_score >= 60:
+            recommendations.append(f"MODERATE ATS score ({total_score:.0f}%). Consider adding more keywords.")
+        else:
+            recommendations.append(f"LOW ATS score ({total_score:.0f}%). Add missing keywords to improve.")
+        
+        # Missing keywords
+        if missing:
+            critical_missing = missing[:5]
+            recommendations.append(f"Add these critical keywords: {', '.join(critical_missing)}")
+        
+        # Density issues
+        if under_represented:
+            recommendations.append(f"Mention more often (2-5 times ideal): {', '.join(under_represented[:3])}")
+        
+        if over_represented:
+            recommendations.append(f"Mentioned too often (reduce): {', '.join(over_represented[:3])}")
+        
+        # Percentage breakdown
+        recommendations.append(f"\nScore Breakdown: Keywords {keyword_score:.0f}/60 + Density {density_score:.0f}/20 + Structure {structure_score:.0f}/20")
+        
+        results.append({
+            'score': round(total_score, 1),
+            'keyword_match_score': round(keyword_score, 1),
+            'density_score': round(density_score, 1),
+            'structure_score': round(structure_score, 1),
+            'matched_keywords': matched,
+            'missing_keywords': missing,
+            'keyword_density': density,
+            'optimal_density_keywords': [keywords[i] for i in np.flatnonzero(optimal_mask[row])],
+            'under_represented': under_represented,
+            'over_represented': over_represented,
+            'recommendations': recommendations
+        })
+    
+    return results
 
 
 def optimize_profile_for_ats(profile: Dict, job_keywords: List[str]) -> Dict:
@@ -294,18 +527,44 @@ def optimize_profile_for_ats(profile: Dict, job_keywords: List[str]) -> Dict:
     Returns:
         Optimized profile dictionary
     """
-    import json
-    
-    # Convert to string for processing
-    profile_str = json.dumps(profile)
-    
-    # Expand abbreviations
-    profile_str = expand_abbreviations(profile_str)
-    
-    # Convert back to dict
-    optimized_profile = json.loads(profile_str)
+    # Skill names are matched verbatim by ATS, so leave them untouched
+    # (avoids "Machine Learning (ML)" crud in the skills list)
+    skill_set = {s.lower() for s in profile.get('skills', []) if isinstance(s, str)}
+    
+    # Strings are expanded one at a time, so mark up front every abbreviation
+    # whose full form is already written anywhere in the profile
+    strings = list(_iter_strings(profile))
+    expanded = {
+        abbr for abbr, full in _ABBREVIATIONS.items()
+        if any(full in s for s in strings)
+    }
     
-    return optimized_profile
+    return _walk_and_expand(profile, skill_set, expanded)
+
+
+def _walk_and_expand(obj: Any, skill_set: Set[str], expanded: Set[str]) -> Any:
+    """Rebuild a profile subtree, expanding abbreviations in string leaves."""
+    if isinstance(obj, str):
+        if obj.lower() in skill_set:
+            return obj
+        return expand_abbreviations(obj, expanded)
+    if isinstance(obj, dict):
+        return {k: _walk_and_expand(v, skill_set, expanded) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_walk_and_expand(v, skill_set, expanded) for v in obj]
+    return obj
+
+
+def _iter_strings(obj: Any):
+    """Yield every string leaf of a profile subtree."""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _iter_strings(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _iter_strings(v)
 
 
 def validate_ats_structure(profile: Dict) -> List[str]:
@@ -360,40 +619,26 @@ def validate_ats_structure(profile: Dict) -> List[str]:
 # ==============================================================================
 
 
+# Markdown code fences around LLM JSON output: opening ```/```json, closing ```
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', flags=re.MULTILINE)
+
+
 def _clean_json(content: str) -> str:
     """Clean JSON response from LLM."""
-    content = content.strip()
-    content = re.sub(r'^```json\s*', '', content, flags=re.MULTILINE)
-    content = re.sub(r'^```\s*', '', content, flags=re.MULTILINE)
-    content = re.sub(r'\s*```$', '', content, flags=re.MULTILINE)
-    return content.strip()
+    return _FENCE_RE.sub('', content.strip()).strip()
 
 
 def _call_llm(prompt: str, model_name: str) -> str:
     """Call LLM and return cleaned response."""
     output = replicate.run(model_name, input={"prompt": prompt})
-    content = "".join([str(x) for x in output]).strip()
-    return _clean_json(content)
+    buffer = io.StringIO()
+    for chunk in output:
+        buffer.write(str(chunk))
+    return _clean_json(buffer.getvalue())
 
 
-def create_refinement_prompt(
-    profile: Dict[str, Any],
-    job_keywords: List[str],
-    ats_result: Dict[str, Any],
-    iteration: int
-) -> str:
-    """
-    Create a prompt for the LLM to refine the CV based on ATS feedback.
-    
-    This prompt is laser-focused on fixing ATS issues without changing structure.
-    """
-    
-    missing_keywords = ats_result.get('missing_keywords', [])[:10]  # Top 10 missing
-    under_represented = ats_result.get('under_represented', [])[:5]  # Top 5 under-represented
-    over_represented = ats_result.get('over_represented', [])
-    current_score = ats_result.get('score', 0)
-    
-    prompt = f"""ROLE: ATS Score Refinement Specialist
+# Static refinement prompt, filled in by create_refinement_prompt
+_REFINEMENT_PROMPT_TEMPLATE = """ROLE: ATS Score Refinement Specialist
 
 CRITICAL MISSION: This CV scored {current_score}% on ATS. Your job is to refine it to 90%+ WITHOUT changing structure.
 
@@ -405,13 +650,13 @@ CURRENT ATS ANALYSIS:
 ISSUES IDENTIFIED:
 
 1. MISSING CRITICAL KEYWORDS (Must Add):
-{chr(10).join([f"   - {kw}" for kw in missing_keywords])}
+{missing_block}
 
 2. UNDER-REPRESENTED KEYWORDS (Need 3-5 mentions each):
-{chr(10).join([f"   - {kw}" for kw in under_represented])}
+{under_block}
 
-{"3. OVER-REPRESENTED KEYWORDS (Reduce to 3-5 mentions):" if over_represented else ""}
-{chr(10).join([f"   - {kw}" for kw in over_represented]) if over_represented else ""}
+{over_header}
+{over_block}
 
 REFINEMENT STRATEGY:
 
@@ -448,10 +693,10 @@ DO NOT merge or consolidate entries
 ONLY enhance descriptions with keywords
 ONLY add missing keywords to skills section
 ONLY adjust keyword density
-MUST preserve ALL entries from input (count: {len(profile.get('experience', []))} experiences, {len(profile.get('projects', []))} projects)
+MUST preserve ALL entries from input (count: {experience_count} experiences, {project_count} projects)
 
 INPUT CV:
-{json.dumps(profile, indent=2)}
+{profile_json}
 
 OUTPUT FORMAT:
 Pure JSON only, no markdown, no commentary, no ```json markers.
@@ -459,6 +704,37 @@ Start with {{ and end with }}.
 
 Return the REFINED CV with better keyword integration.
 """
+
+
+def create_refinement_prompt(
+    profile: Dict[str, Any],
+    job_keywords: List[str],
+    ats_result: Dict[str, Any],
+    iteration: int
+) -> str:
+    """
+    Create a prompt for the LLM to refine the CV based on ATS feedback.
+    
+    This prompt is laser-focused on fixing ATS issues without changing structure.
+    """
+    
+    missing_keywords = ats_result.get('missing_keywords', [])[:10]  # Top 10 missing
+    under_represented = ats_result.get('under_represented', [])[:5]  # Top 5 under-represented
+    over_represented = ats_result.get('over_represented', [])
+    current_score = ats_result.get('score', 0)
+    
+    prompt = _REFINEMENT_PROMPT_TEMPLATE.format(
+        current_score=current_score,
+        iteration=iteration,
+        missing_block="\n".join(f"   - {kw}" for kw in missing_keywords),
+        under_block="\n".join(f"   - {kw}" for kw in under_represented),
+        over_header="3. OVER-REPRESENTED KEYWORDS (Reduce to 3-5 mentions):" if over_represented else "",
+        over_block="\n".join(f"   - {kw}" for kw in over_represented),
+        experience_count=len(profile.get('experience', [])),
+        project_count=len(profile.get('projects', [])),
+        # Compact JSON: indentation only costs tokens, the LLM doesn't need it
+        profile_json=json.dumps(profile, separators=(',', ':'), ensure_ascii=False)
+    )
     
     return prompt
 
@@ -469,87 +745,108 @@ def refine_cv_for_ats(
     model_name: str = "openai/gpt-4.1-mini",
     max_iterations: int = 3,
     target_score: float = 90.0,
-    min_improvement: float = 5.0
+    min_improvement: float = 5.0,
+    verbose: bool = True
 ) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
     """
     Iteratively refine CV until it achieves target ATS score.
     
     Args:
-        profile: The CV profile to refine
+        profile: The CV profile to refine (left unmodified; the caller keeps ownership)
         job_keywords: Keywords from job posting
         model_name: LLM model to use
         max_iterations: Maximum refinement iterations (default: 3)
         target_score: Target ATS score (default: 90.0)
         min_improvement: Minimum improvement to continue (default: 5.0)
+        verbose: Print progress (default: True). Lines are buffered and written
+            once per step instead of one print call per line.
     
     Returns:
         Tuple of (refined_profile, final_ats_result, iterations_used)
     """
+    # Case variants ("Python"/"python") would be scored twice; keep the first spelling
+    unique_keywords: Dict[str, str] = {}
+    for keyword in job_keywords:
+        unique_keywords.setdefault(keyword.lower(), keyword)
+    job_keywords = list(unique_keywords.values())
+    
+    log: List[str] = []
+    
+    def flush_log() -> None:
+        if verbose and log:
+            sys.stdout.write("\n".join(log) + "\n")
+        log.clear()
     
-    print("ATS Iterative Refinement")
-    print(f"Target: {target_score}% ATS Score")
-    print(f"Max Iterations: {max_iterations}")
+    log.append("ATS Iterative Refinement")
+    log.append(f"Target: {target_score}% ATS Score")
+    log.append(f"Max Iterations: {max_iterations}")
     
-    current_profile = profile.copy()
+    # No copy needed: optimize_profile_for_ats rebuilds the profile and later
+    # iterations replace it with parsed LLM output, so profile is never mutated
+    current_profile = profile
     iteration = 0
     previous_score = 0
     
     while iteration < max_iterations:
         iteration += 1
         
-        print(f"Iteration {iteration}/{max_iterations}")
+        log.append(f"Iteration {iteration}/{max_iterations}")
 
         
         # Apply basic ATS optimization (abbreviation expansion)
         if iteration == 1:
-            print("\nApplying baseline ATS optimization (abbreviation expansion)...")
+            log.append("\nApplying baseline ATS optimization (abbreviation expansion)...")
             current_profile = optimize_profile_for_ats(current_profile, job_keywords)
         
         # Predict current ATS score
-        print(f"\nCalculating ATS score...")
-        cv_text = json.dumps(current_profile)
-        ats_result = predict_ats_score(cv_text, job_keywords)
+        log.append(f"\nCalculating ATS score...")
+        cv_text = orjson.dumps(current_profile).decode()
+        ats_result = predict_ats_score(cv_text, job_keywords, profile=current_profile)
         current_score = ats_result['score']
         
-        print(f"\nCurrent Score: {current_score:.1f}%")
-        print(f"Score Breakdown:")
-        print(f"  Keyword Match: {ats_result['keyword_match_score']:.1f}/60")
-        print(f"  Keyword Density: {ats_result['density_score']:.1f}/20")
-        print(f"  Structure: {ats_result['structure_score']:.1f}/20")
-        print(f"Matched Keywords: {len(ats_result['matched_keywords'])}/{len(job_keywords)}")
-        print(f"Missing Keywords: {len(ats_result['missing_keywords'])}")
+        log.append(f"\nCurrent Score: {current_score:.1f}%")
+        log.append(f"Score Breakdown:")
+        log.append(f"  Keyword Match: {ats_result['keyword_match_score']:.1f}/60")
+        log.append(f"  Keyword Density: {ats_result['density_score']:.1f}/20")
+        log.append(f"  Structure: {ats_result['structure_score']:.1f}/20")
+        log.append(f"Matched Keywords: {len(ats_result['matched_keywords'])}/{len(job_keywords)}")
+        log.append(f"Missing Keywords: {len(ats_result['missing_keywords'])}")
         
         # Check if we've reached target
         if current_score >= target_score:
-            print(f"\nTarget achieved: {current_score:.1f}% (target: {target_score}%)")
-            print(f"Converged in {iteration} iteration(s)")
+            log.append(f"\nTarget achieved: {current_score:.1f}% (target: {target_score}%)")
+            log.append(f"Converged in {iteration} iteration(s)")
+            flush_log()
             return current_profile, ats_result, iteration
         
         # Check if we're making progress
         improvement = current_score - previous_score
         if iteration > 1 and improvement < min_improvement:
-            print(f"\nImprovement only {improvement:.1f}% (minimum: {min_improvement}%)")
-            print(f"Stopping at {current_score:.1f}% to avoid diminishing returns")
+            log.append(f"\nImprovement only {improvement:.1f}% (minimum: {min_improvement}%)")
+            log.append(f"Stopping at {current_score:.1f}% to avoid diminishing returns")
+            flush_log()
             return current_profile, ats_result, iteration
         
         # Show what needs improvement
         if ats_result['missing_keywords']:
-            print(f"\nTop Missing Keywords: {', '.join(ats_result['missing_keywords'][:5])}")
+            log.append(f"\nTop Missing Keywords: {', '.join(ats_result['missing_keywords'][:5])}")
         
         if ats_result['under_represented']:
-            print(f"Under-Represented: {', '.join(ats_result['under_represented'][:3])}")
+            log.append(f"Under-Represented: {', '.join(ats_result['under_represented'][:3])}")
         
         if ats_result['over_represented']:
-            print(f"Over-Represented: {', '.join(ats_result['over_represented'][:3])}")
+            log.append(f"Over-Represented: {', '.join(ats_result['over_represented'][:3])}")
         
         # Don't refine on last iteration if we haven't reached target
         if iteration == max_iterations:
-            print(f"\nReached max iterations ({max_iterations})")
-            print(f"Final score: {current_score:.1f}% (target: {target_score}%)")
+            log.append(f"\nReached max iterations ({max_iterations})")
+            log.append(f"Final score: {current_score:.1f}% (target: {target_score}%)")
+            flush_log()
             return current_profile, ats_result, iteration
         
         # Refine with LLM
-        print(f"\nRefining CV with AI to fix ATS issues...")
+        log.append(f"\nRefining CV with AI to fix ATS issues...")
+        flush_log()
         refinement_prompt = create_refinement_prompt(
             current_profile,
             job_keywords,
@@ -559,21 +856,23 @@ def refine_cv_for_ats(
         
         try:
             refined_json = _call_llm(refinement_prompt, model_name=model_name)
-            current_profile = json.loads(refined_json)
-            print(f"Refinement complete")
+            current_profile = orjson.loads(refined_json)
+            log.append(f"Refinement complete")
         except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Keeping previous version and continuing...")
+            log.append(f"JSON parsing error: {e}")
+            log.append(f"Keeping previous version and continuing...")
         except Exception as e:
-            print(f"Refinement error: {e}")
-            print(f"Keeping previous version and continuing...")
+            log.append(f"Refinement error: {e}")
+            log.append(f"Keeping previous version and continuing...")
         
         previous_score = current_score
+        flush_log()
     
     # Final result
-    print(f"Refinement Complete")
-    print(f"Final Score: {current_score:.1f}% (Target: {target_score}%)")
-    print(f"Iterations: {iteration}/{max_iterations}")
+    log.append(f"Refinement Complete")
+    log.append(f"Final Score: {current_score:.1f}% (Target: {target_score}%)")
+    log.append(f"Iterations: {iteration}/{max_iterations}")
+    flush_log()
     
     return current_profile, ats_result, iteration
 
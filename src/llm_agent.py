@@ -1,15 +1,15 @@
-import json
-import re
+import io
+import asyncio
+import hashlib
+import tempfile
 import os
 import copy
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+import orjson
 import replicate
-import PyPDF2
-import pdfplumber
-import fitz
-import pytesseract
-from pdf2image import convert_from_path
 from dotenv import load_dotenv
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Optional, Union
 
 load_dotenv()
 api_token = os.getenv("REPLICATE_API_TOKEN")
@@ -17,9 +17,24 @@ api_token = os.getenv("REPLICATE_API_TOKEN")
 if not api_token:
     raise ValueError("REPLICATE_API_TOKEN is not set in environment variables.")
 
+# Opt-in on-disk cache of parsed LLM responses, keyed by model + prompt.
+# Off unless AUTOMATIC_CV_LLM_CACHE=1: entries hold CV content in plain JSON
+_LLM_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "automatic-cv")
+_LLM_CACHE_MAX_ENTRIES = 10000
+_llm_cache_enabled = os.getenv("AUTOMATIC_CV_LLM_CACHE", "").lower() in ("1", "true", "yes")
+
+# pdfplumber gives up after the first page if it yields less text than this
+_PDF_PROBE_MIN_CHARS = 50
+
+# OCR resolution, and the fallback used for pages that yield too little text
+_OCR_DPI = 200
+_OCR_RETRY_DPI = 300
+_OCR_MIN_CHARS_PER_PAGE = 200
+
 # Prompt loader
+@lru_cache(maxsize=32)
 def load_prompt(name: str) -> str:
-    """Load prompt from prompts/ directory."""
+    """Load prompt from prompts/ directory (read once per process)."""
     prompt_path = os.path.join("prompts", f"{name}.txt")
     if not os.path.exists(prompt_path):
         raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
@@ -27,36 +42,222 @@ def load_prompt(name: str) -> str:
         return f.read()
 
 
+def _compact(obj: Any) -> str:
+    """Serialize obj for a prompt without indentation (fewer tokens to prefill)."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _extract_json_object(content: str) -> Optional[str]:
+    """
+    Return the first balanced {...} object in content that parses, or None.
+    
+    Scans from each "{" in turn (starting after a ```json marker if present),
+    tracking brace depth and skipping braces inside JSON strings; candidates
+    that don't parse (e.g. "{your}" in leading prose) are skipped.
+    """
+    fence = content.find("```json")
+    start = content.find("{", fence + 1 if fence >= 0 else 0)
+    while start >= 0:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(content)):
+            c = content[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif c == '\\':
+                    escaped = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if depth == 0:
+                    candidate = content[start:i + 1]
+                    try:
+                        orjson.loads(candidate)
+                        return candidate
+                    except orjson.JSONDecodeError:
+                        break
+        start = content.find("{", start + 1)
+    return None
+
+
 def _clean_json(content: str) -> str:
     """Clean markdown from LLM output."""
+    # The fences are known to sit at the ends, so slice them off
     if content.startswith("```json"):
-        content = content.split("```json", 1)[1]
+        content = content[7:]
     elif content.startswith("```"):
-        content = content.split("```", 1)[1]
+        content = content[3:]
     if content.endswith("```"):
-        content = content.rsplit("```", 1)[0]
-    return content.strip()
+        content = content[:-3]
+    content = content.strip()
+    
+    # Prose around the object (or a fence that isn't at the very start):
+    # fall back to locating the object itself
+    if not (content.startswith("{") and content.endswith("}")):
+        content = _extract_json_object(content) or content
+    return content
+
+
+def _cache_path(model_name: str, prompt: str) -> str:
+    """Path of the on-disk cache entry for a (model, prompt) pair."""
+    digest = hashlib.blake2b(f"{model_name}\0{prompt}".encode("utf-8"), digest_size=20).hexdigest()
+    return os.path.join(_LLM_CACHE_DIR, f"{digest}.json")
+
+
+def _prune_llm_cache() -> None:
+    """Drop the least recently used cache entries beyond _LLM_CACHE_MAX_ENTRIES."""
+    entries = [e for e in os.scandir(_LLM_CACHE_DIR) if e.name.endswith(".json")]
+    if len(entries) <= _LLM_CACHE_MAX_ENTRIES:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - _LLM_CACHE_MAX_ENTRIES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def set_response_cache(enabled: bool) -> None:
+    """
+    Turn the on-disk LLM response cache on or off for this process.
+    
+    Overrides the AUTOMATIC_CV_LLM_CACHE environment variable.
+    """
+    global _llm_cache_enabled
+    _llm_cache_enabled = enabled
+
+
+def _run_llm(model_name: str, prompt: str) -> str:
+    """
+    Run a Replicate model and return its text output.
+    
+    The output is consumed as it streams; once the top-level JSON object has
+    closed, trailing commentary (or a closing fence) is not waited for.
+    
+    Args:
+        model_name: Replicate model identifier
+        prompt: Fully formatted prompt
+    
+    Returns:
+        Raw model output (stripped)
+    """
+    output = replicate.run(model_name, input={"prompt": prompt})
+    buffer = io.StringIO()
+    # Brace depth of the top-level object, tracked across chunks. Tracking
+    # only starts at a "{" that opens a line or follows a ```json fence, so
+    # braces in leading prose ("Here is {your} CV") are not mistaken for it
+    depth = 0
+    in_string = False
+    escaped = False
+    line_start = True
+    done = False
+    for chunk in output:
+        chunk = str(chunk)
+        offset = buffer.tell()
+        buffer.write(chunk)
+        for i, c in enumerate(chunk):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif c == '\\':
+                    escaped = True
+                elif c == '"':
+                    in_string = False
+            elif not depth:
+                if c == '{' and (line_start or "```json" in buffer.getvalue()[:offset + i]):
+                    depth = 1
+                elif c == '\n':
+                    line_start = True
+                elif c not in ' \t\r':
+                    line_start = False
+            elif c == '"':
+                in_string = True
+            elif c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if depth == 0:
+                    done = True
+                    break
+        if done:
+            break
+    # Stop polling the prediction for output we are not going to read
+    if hasattr(output, "close"):
+        output.close()
+    return buffer.getvalue().strip()
+
+
+def _run_llm_json(model_name: str, prompt: str, force: bool = False) -> Any:
+    """
+    Run a model via _run_llm and parse its reply as JSON (fences/prose stripped).
+    
+    When the response cache is enabled, a reply is stored only after it has
+    parsed, so an empty or malformed reply is never served again.
+    
+    Args:
+        model_name: Replicate model identifier
+        prompt: Fully formatted prompt
+        force: Ignore any cached response and call the model again
+    
+    Returns:
+        Parsed JSON value
+    """
+    cache_path = _cache_path(model_name, prompt) if _llm_cache_enabled else None
+    if cache_path and not force:
+        try:
+            with open(cache_path, 'rb') as f:
+                parsed = orjson.loads(f.read())["response"]
+            # Bump mtime so pruning evicts least recently used entries first
+            os.utime(cache_path)
+            return parsed
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    parsed = orjson.loads(_clean_json(_run_llm(model_name, prompt)))
+    
+    if cache_path:
+        # Write to a temp file and rename, so a crash never leaves a torn entry
+        try:
+            os.makedirs(_LLM_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=_LLM_CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps({"model": model_name, "response": parsed}))
+            os.replace(tmp_path, cache_path)
+            _prune_llm_cache()
+        except (OSError, TypeError) as e:
+            print(f"Could not cache LLM response: {e}")
+    
+    return parsed
 
 
-def generate_optimized_profile(profile: dict, job_info: dict, model_name: str) -> dict:
-    """Generate optimized CV."""
+def generate_optimized_profile(profile: dict, job_info: dict, model_name: str, force: bool = False) -> dict:
+    """Generate optimized CV (force=True bypasses the response cache)."""
     prompt_template = load_prompt("cv_optimization")
     prompt = prompt_template.format(
-        profile=json.dumps(profile, indent=2, ensure_ascii=False),
-        job_info=json.dumps(job_info, indent=2, ensure_ascii=False)
+        profile=_compact(profile),
+        job_info=_compact(job_info)
     )
     
-    output = replicate.run(model_name, input={"prompt": prompt})
-    content = "".join([str(x) for x in output]).strip()
-    content = _clean_json(content)
-    
-    return json.loads(content)
+    return _run_llm_json(model_name, prompt, force=force)
 
 
-def optimize_cv_with_rag(profile: Dict[str, Any], job_info: Dict[str, Any], model_name: str) -> Dict[str, Any]:
+def optimize_cv_with_rag(
+    profile: Dict[str, Any],
+    job_info: Dict[str, Any],
+    model_name: str,
+    force: bool = False
+) -> Dict[str, Any]:
     """
     Generate optimized CV using RAG-enhanced prompt.
     This function expects pre-filtered content from the RAG system.
+    force=True bypasses the response cache.
     """
     # Check if RAG-specific prompt exists, otherwise fall back to standard
     try:
@@ -66,30 +267,23 @@ def optimize_cv_with_rag(profile: Dict[str, Any], job_info: Dict[str, Any], mode
         prompt_template = load_prompt("cv_optimization")
     
     prompt = prompt_template.format(
-        profile=json.dumps(profile, indent=2, ensure_ascii=False),
-        job_info=json.dumps(job_info, indent=2, ensure_ascii=False)
+        profile=_compact(profile),
+        job_info=_compact(job_info)
     )
     
-    output = replicate.run(model_name, input={"prompt": prompt})
-    content = "".join([str(x) for x in output]).strip()
-    content = _clean_json(content)
-    
-    return json.loads(content)
+    return _run_llm_json(model_name, prompt, force=force)
 
 
-def extract_relevant_job_info(job_raw_text: str, model_name: str) -> dict:
-    """Extract job posting info."""
-    clean_text = re.sub(r'\s+', ' ', job_raw_text).strip()
+def extract_relevant_job_info(job_raw_text: str, model_name: str, force: bool = False) -> dict:
+    """Extract job posting info (force=True bypasses the response cache)."""
+    # Collapse whitespace runs to single spaces; str.split is faster than re.sub here
+    clean_text = " ".join(job_raw_text.split())
     prompt_template = load_prompt("job_extraction")
     prompt = prompt_template.replace("{job_text}", clean_text)
     
-    output = replicate.run(model_name, input={"prompt": prompt})
-    content = "".join([str(x) for x in output]).strip()
-    content = _clean_json(content)
-    
     try:
-        parsed = json.loads(content)
-    except json.JSONDecodeError:
+        parsed = _run_llm_json(model_name, prompt, force=force)
+    except orjson.JSONDecodeError:
         parsed = {
             "title": "", "company": "", "location": "",
             "summary": clean_text,
@@ -97,7 +291,11 @@ def extract_relevant_job_info(job_raw_text: str, model_name: str) -> dict:
         }
     
     # Post-process
-    parsed['keywords'] = sorted(list(dict.fromkeys(parsed.get('keywords',[]))))
+    # Dedupe case-insensitively (ATS matching ignores case), keeping the first spelling
+    unique_keywords = {}
+    for keyword in parsed.get('keywords', []):
+        unique_keywords.setdefault(str(keyword).lower(), keyword)
+    parsed['keywords'] = sorted(unique_keywords.values())
     for field in ['requirements', 'responsibilities']:
         if not isinstance(parsed.get(field), list):
             parsed[field] = []
@@ -105,7 +303,70 @@ def extract_relevant_job_info(job_raw_text: str, model_name: str) -> dict:
     return parsed
 
 
-def extract_cv_from_pdf_smart(pdf_path: str, model_name: str) -> dict:
+async def extract_relevant_job_info_async(job_raw_text: str, model_name: str, force: bool = False) -> dict:
+    """Async twin of extract_relevant_job_info (runs it in a worker thread)."""
+    return await asyncio.to_thread(extract_relevant_job_info, job_raw_text, model_name, force)
+
+
+async def generate_optimized_profile_async(
+    profile: dict,
+    job_info: dict,
+    model_name: str,
+    force: bool = False
+) -> dict:
+    """Async twin of generate_optimized_profile (runs it in a worker thread)."""
+    return await asyncio.to_thread(generate_optimized_profile, profile, job_info, model_name, force)
+
+
+async def optimize_cv_with_rag_async(
+    profile: Dict[str, Any],
+    job_info: Dict[str, Any],
+    model_name: str,
+    force: bool = False
+) -> Dict[str, Any]:
+    """Async twin of optimize_cv_with_rag (runs it in a worker thread)."""
+    return await asyncio.to_thread(optimize_cv_with_rag, profile, job_info, model_name, force)
+
+
+async def extract_relevant_job_info_many(
+    job_texts: List[str],
+    model_name: str,
+    max_concurrency: int = 8
+) -> List[Union[dict, BaseException]]:
+    """
+    Extract several job postings concurrently.
+    
+    Each extraction runs in a worker thread, so streaming, caching and JSON
+    cleanup behave exactly as in extract_relevant_job_info.
+    
+    Args:
+        job_texts: Raw job posting texts
+        model_name: Replicate model name
+        max_concurrency: Maximum requests in flight (respects rate limits)
+    
+    Returns:
+        One entry per text, in order: the job info dict, or the exception
+        raised for that text
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def extract_one(job_text: str) -> dict:
+        async with semaphore:
+            return await extract_relevant_job_info_async(job_text, model_name)
+    
+    return await asyncio.gather(*(extract_one(text) for text in job_texts), return_exceptions=True)
+
+
+def extract_relevant_job_info_batch(
+    job_texts: List[str],
+    model_name: str,
+    max_concurrency: int = 8
+) -> List[Union[dict, BaseException]]:
+    """Synchronous wrapper around extract_relevant_job_info_many."""
+    return asyncio.run(extract_relevant_job_info_many(job_texts, model_name, max_concurrency))
+
+
+def extract_cv_from_pdf_smart(pdf_path: str, model_name: str, force: bool = False) -> dict:
     """
     Smart CV extraction from PDF: tries fast methods first, falls back to OCR if needed.
     Intelligently fills in missing structured information while preserving existing content.
@@ -113,6 +374,7 @@ def extract_cv_from_pdf_smart(pdf_path: str, model_name: str) -> dict:
     Args:
         pdf_path: Path to the PDF file
         model_name: Replicate model name to use for extraction
+        force: Ignore any cached response and call the model again
     
     Returns:
         dict: Structured CV data matching the required JSON format
@@ -122,76 +384,86 @@ def extract_cv_from_pdf_smart(pdf_path: str, model_name: str) -> dict:
         """
         Try multiple extraction methods in order of speed/reliability.
         """
-        text = ""
-        
-        # Method 1: Try pdfplumber (fast, works for 80% of CVs)
-        try:
-            print("Attempting extraction with pdfplumber...")
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            if text.strip():
-                print("Successfully extracted text directly from PDF")
-                return text
-            else:
-                print("✗ pdfplumber found no text")
-        except ImportError:
-            print("✗ pdfplumber not installed, trying next method...")
-        except Exception as e:
-            print(f"✗ pdfplumber failed: {e}")
-        
-        # Method 2: Try PyMuPDF (fitz)
+        # Method 1: Try PyMuPDF (fastest, no per-character layout analysis)
+        fitz_found_nothing = False
         try:
             import fitz
             print("Attempting extraction with PyMuPDF...")
-            doc = fitz.open(file_path)
-            for page in doc:
-                text += page.get_text() + "\n"
-            doc.close()
+            with fitz.open(file_path) as doc:
+                text = "\n".join(page.get_text() for page in doc)
             
             if text.strip():
                 print("Successfully extracted text using PyMuPDF")
                 return text
             else:
+                fitz_found_nothing = True
                 print("✗ PyMuPDF found no text")
         except ImportError:
             print("✗ PyMuPDF not installed, trying next method...")
         except Exception as e:
             print(f"✗ PyMuPDF failed: {e}")
         
-        # Method 3: Try PyPDF2 (basic fallback)
+        # Method 2: Try pdfplumber (slower, different parser for odd encodings)
         try:
-            import PyPDF2
-            print("Attempting extraction with PyPDF2...")
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            import pdfplumber
+            print("Attempting extraction with pdfplumber...")
+            with pdfplumber.open(file_path) as pdf:
+                if fitz_found_nothing:
+                    # PyMuPDF read the file and found no text, so this is likely
+                    # a scan: probe the first page before paying layout analysis on all
+                    first_text = pdf.pages[0].extract_text() if pdf.pages else None
+                    if len((first_text or "").strip()) < _PDF_PROBE_MIN_CHARS:
+                        page_texts = []
+                    else:
+                        page_texts = [first_text] + [page.extract_text() for page in pdf.pages[1:]]
+                else:
+                    page_texts = [page.extract_text() for page in pdf.pages]
+            text = "\n".join(page_text for page_text in page_texts if page_text)
             
             if text.strip():
-                print("Successfully extracted text using PyPDF2")
+                print("Successfully extracted text directly from PDF")
                 return text
             else:
-                print("✗ PyPDF2 found no text")
+                print("✗ pdfplumber found no text")
         except ImportError:
-            print("✗ PyPDF2 not installed, trying OCR...")
+            print("✗ pdfplumber not installed, trying OCR...")
         except Exception as e:
-            print(f"✗ PyPDF2 failed: {e}")
+            print(f"✗ pdfplumber failed: {e}")
         
-        # Method 4: Fallback to OCR (slow but works on scanned PDFs)
+        # Method 3: Fallback to OCR (slow but works on scanned PDFs)
         print("⚠ No text extraction worked, attempting OCR (this may take a minute)...")
         try:
-            from pdf2image import convert_from_path
+            from pdf2image import convert_from_path, pdfinfo_from_path
             import pytesseract
             
-            images = convert_from_path(file_path, dpi=300)
-            for i, image in enumerate(images):
-                print(f"  OCR processing page {i+1}/{len(images)}...")
-                page_text = pytesseract.image_to_string(image, lang='eng')
-                text += page_text + "\n"
+            page_count = pdfinfo_from_path(file_path)["Pages"]
+            workers = max(1, int(os.getenv("OCR_CONCURRENCY", os.cpu_count() or 1)))
+            ocr_page = partial(pytesseract.image_to_string, lang='eng')
+            
+            def render_and_ocr(page_number: int, dpi: int) -> str:
+                print(f"  OCR processing page {page_number}/{page_count} at {dpi} DPI...")
+                image = convert_from_path(
+                    file_path, dpi=dpi, grayscale=True,
+                    first_page=page_number, last_page=page_number
+                )[0]
+                return ocr_page(image)
+            
+            def ocr_adaptive(page_number: int) -> str:
+                # 200 DPI grayscale is enough for typed CVs; only go back to
+                # 300 DPI for a page that yields suspiciously little text
+                page_text = render_and_ocr(page_number, _OCR_DPI)
+                if len(page_text.strip()) < _OCR_MIN_CHARS_PER_PAGE:
+                    retry_text = render_and_ocr(page_number, _OCR_RETRY_DPI)
+                    if len(retry_text.strip()) > len(page_text.strip()):
+                        page_text = retry_text
+                return page_text
+            
+            # Each worker rasterizes one page and OCRs it, so poppler and
+            # tesseract overlap across pages and at most `workers` page images
+            # are in memory; pytesseract runs tesseract in its own process, so
+            # threads are enough here
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                text = "\n".join(executor.map(ocr_adaptive, range(1, page_count + 1)))
             
             if text.strip():
                 print("Successfully extracted text using OCR")
@@ -221,11 +493,7 @@ def extract_cv_from_pdf_smart(pdf_path: str, model_name: str) -> dict:
     prompt_template = load_prompt("cv_extraction")
     prompt = prompt_template.format(cv_text=cv_text)
     
-    output = replicate.run(model_name, input={"prompt": prompt})
-    content = "".join([str(x) for x in output]).strip()
-    content = _clean_json(content)
-    
-    return json.loads(content)
+    return _run_llm_json(model_name, prompt, force=force)
     
 
 # def enhance_project_descriptions(
@@ -298,8 +566,17 @@ def save_cv_to_json(cv_data: dict, output_path: str) -> None:
         output_path: Path where JSON file should be saved
     """
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(cv_data, f, indent=2, ensure_ascii=False)
+        data = orjson.dumps(cv_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        # Write next to the target and rename, so a crash never leaves a partial file
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         print(f"CV data successfully saved to {output_path}")
     except Exception as e:
         raise ValueError(f"Error saving JSON file: {str(e)}")
\ No newline at end of file
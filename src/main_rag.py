@@ -23,7 +23,7 @@ from llm_agent import (
     generate_optimized_profile
 )
 from renderer import render_cv_pdf_html
-from rag_system import CVRAGSystem, RAGEnhancedGenerator
+from rag_system import prepare_rag_generation
 from ats_optimizer import refine_cv_for_ats
 
 #from structure_validator import fix_structure, validate_structure, print_validation_report
@@ -92,7 +92,14 @@ def main():
         else:
             job_text = ""
         
-    job_info = extract_relevant_job_info(job_text, "openai/gpt-4.1-mini")
+    # Extract job info while the RAG system is initialized and the profile
+    # (now with enhanced project descriptions) is indexed
+    job_info, rag_generator = prepare_rag_generation(
+        profile=profile,
+        job_text=job_text,
+        extract_function=extract_relevant_job_info,
+        model_name="openai/gpt-4.1-mini"
+    )
     
     job_info_path = os.path.join("output/temp", "job_info.json")
     os.makedirs(os.path.dirname(job_info_path), exist_ok=True)
@@ -100,18 +107,6 @@ def main():
         json.dump(job_info, f, indent=2)
     print(f"Saved job info to {job_info_path}")
     
-    
-    # Initialize RAG system
-    rag_system = CVRAGSystem()
-
-    rag_system.reset_database()
-        
-    # Index profile content (now with enhanced project descriptions)
-    rag_system.index_profile(profile)
-        
-    # Create RAG-enhanced generator
-    rag_generator = RAGEnhancedGenerator(rag_system)
-    
     # Generate optimized profile
     generated_profile = rag_generator.generate_optimized_profile_with_rag(
         profile=profile,
@@ -9,10 +9,13 @@ This module implements a complete RAG system using:
 """
 
 import os
+import re
 import json
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 # Disable tokenizers parallelism warning (before importing sentence_transformers)
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -25,6 +28,21 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Four-digit years in experience periods / project years
+_YEAR_RE = re.compile(r'\d{4}')
+
+
+@lru_cache(maxsize=4)
+def _load_embedding_model(model_name: str) -> SentenceTransformer:
+    """
+    Load a sentence transformer once per process.
+    
+    The API builds a new CVRAGSystem for every request; sharing the model
+    avoids reloading its weights each time. Only the read-only model is
+    shared, each system still has its own ChromaDB handle.
+    """
+    return SentenceTransformer(model_name)
+
 
 @dataclass
 class RetrievalResult:
@@ -71,7 +89,7 @@ class CVRAGSystem:
         print(f"Initializing RAG system with model: {model_name}")
         
         # Initialize embedding model
-        self.embedding_model = SentenceTransformer(model_name)
+        self.embedding_model = _load_embedding_model(model_name)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         
         # Initialize ChromaDB
@@ -537,8 +555,7 @@ class CVRAGSystem:
             return 0.0
         
         # Extract years (e.g., "2023-2024", "Jan 2023 - Dec 2024", or just "2024")
-        import re
-        years = re.findall(r'\d{4}', str(period_or_year))
+        years = _YEAR_RE.findall(str(period_or_year))
         
         if not years:
             return 0.0
@@ -739,7 +756,9 @@ class RAGEnhancedGenerator:
         )
         
         # Show skills that match job keywords (BALANCED: technical synonyms OK, generic ones NO)
-        job_keywords_lower = [k.lower() for k in job_info.get('keywords', [])]
+        # Set for O(1) exact lookups; synonym variants computed once per job keyword
+        job_keywords_lower = {k.lower() for k in job_info.get('keywords', [])}
+        job_variants = [self.rag._normalize_keyword(job_kw) for job_kw in job_keywords_lower]
         
         # Build match list with balanced synonym matching
         relevant_top_10 = []
@@ -765,16 +784,10 @@ class RAGEnhancedGenerator:
                     continue
             
             # Check for match using synonym-aware matching for technical terms
-            is_relevant = False
             skill_variants = self.rag._normalize_keyword(skill_lower)
             
-            for job_kw in job_keywords_lower:
-                job_variants = self.rag._normalize_keyword(job_kw)
-                
-                # Match if variants overlap
-                if skill_variants & job_variants:
-                    is_relevant = True
-                    break
+            # Match if variants overlap
+            is_relevant = any(skill_variants & variants for variants in job_variants)
             
             if is_relevant:
                 relevant_top_10.append(skill)
@@ -811,3 +824,37 @@ class RAGEnhancedGenerator:
         
         print("RAG-enhanced generation complete\n")
         return optimized
+
+
+def prepare_rag_generation(
+    profile: Dict[str, Any],
+    job_text: str,
+    extract_function: callable,
+    model_name: str
+) -> Tuple[Dict[str, Any], RAGEnhancedGenerator]:
+    """
+    Extract job info and index the profile concurrently.
+    
+    The job extraction is an LLM round trip while building the RAG system
+    (embedding model load + indexing) is local work, and neither needs the
+    other, so the LLM call runs in a worker thread meanwhile.
+    
+    Args:
+        profile: Complete profile dictionary to index
+        job_text: Raw job description text
+        extract_function: Job extraction function (job_text, model_name) -> job_info
+        model_name: Model name passed to extract_function
+    
+    Returns:
+        Tuple of (job_info, RAG generator ready for generation)
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job_future = executor.submit(extract_function, job_text, model_name)
+        
+        rag_system = CVRAGSystem()
+        rag_system.reset_database()
+        rag_system.index_profile(profile)
+        
+        job_info = job_future.result()
+    
+    return job_info, RAGEnhancedGenerator(rag_system)
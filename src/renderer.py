@@ -1,10 +1,99 @@
-from jinja2 import Template
 from io import BytesIO
-from weasyprint import HTML
+from collections import OrderedDict
+from functools import lru_cache
 import subprocess
+import threading
+import hashlib
+import json
 import os
 
 
+_TEMPLATE_PATHS = {
+    "tech": "templates/cv_template_tech.html",
+    "business": "templates/cv_template_business.html",
+    "modern": "templates/cv_template_modern.html"
+}
+
+# Recently rendered PDFs keyed by profile content + template version, so
+# rendering an unchanged CV again skips the (slow) WeasyPrint pass
+_PDF_CACHE_SIZE = 16
+_pdf_cache: "OrderedDict[str, bytes]" = OrderedDict()
+# The API renders from worker threads; guards lookups and evictions
+_pdf_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _get_font_config():
+    """Create the WeasyPrint font configuration shared by all renders."""
+    from weasyprint.text.fonts import FontConfiguration
+    
+    # Creating one sets up fontconfig state, so it's built once
+    return FontConfiguration()
+
+
+@lru_cache(maxsize=8)
+def _load_template(template_path, mtime):
+    """
+    Read and compile a Jinja template once.
+    
+    Args:
+        template_path: Path to the HTML template
+        mtime: Template modification time (part of the cache key, so edits are picked up)
+    
+    Returns:
+        Compiled jinja2 Template
+    """
+    from jinja2 import Template
+    
+    with open(template_path, "r", encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def _render_pdf_bytes(profile, template_path):
+    """
+    Render a profile with the given template and return the PDF bytes.
+    
+    Args:
+        profile: Profile data dictionary
+        template_path: Path to the HTML template
+    
+    Returns:
+        PDF document as bytes (cached per profile content and template mtime)
+    """
+    mtime = os.path.getmtime(template_path)
+    key = hashlib.sha256(
+        json.dumps(profile, sort_keys=True, default=str).encode("utf-8")
+        + f"{template_path}:{mtime}".encode("utf-8")
+    ).hexdigest()
+    
+    with _pdf_cache_lock:
+        pdf_bytes = _pdf_cache.get(key)
+        if pdf_bytes is not None:
+            _pdf_cache.move_to_end(key)
+            return pdf_bytes
+    
+    jinja_template = _load_template(template_path, mtime)
+    rendered_html = jinja_template.render(**profile)
+
+    # Write HTML for debugging
+    # html_file = output_path.replace(".pdf", ".html")
+    # with open(html_file, "w", encoding="utf-8") as f:
+    #     f.write(rendered_html)
+
+    # Imported on first render rather than at module import: WeasyPrint takes
+    # hundreds of ms to load, which callers that never render shouldn't pay
+    from weasyprint import HTML
+    
+    pdf_bytes = HTML(string=rendered_html).write_pdf(font_config=_get_font_config())
+    
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf_bytes
+        if len(_pdf_cache) > _PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+    
+    return pdf_bytes
+
+
 def render_cv_pdf_html(profile, template, output_path="output/cv_output.pdf", output_filename=None):
     """
     Render CV to PDF using HTML template
@@ -20,31 +109,18 @@ def render_cv_pdf_html(profile, template, output_path="output/cv_output.pdf", ou
     if output_filename:
         output_path = os.path.join("output", output_filename)
     
-    if template == "tech":
-        template_path = "templates/cv_template_tech.html"
-    elif template == "business":
-        template_path = "templates/cv_template_business.html"
-    elif template == "modern":
-        template_path = "templates/cv_template_modern.html"
-    else:
+    template_path = _TEMPLATE_PATHS.get(template)
+    if not template_path:
         raise ValueError("Invalid template type. Choose 'tech', 'business', or 'modern'.")
 
-    with open(template_path, "r", encoding="utf-8") as f:
-        template_content = f.read()
-
-    jinja_template = Template(template_content)
-    rendered_html = jinja_template.render(**profile)
-
-    # Write HTML for debugging
-    # html_file = output_path.replace(".pdf", ".html")
-    # with open(html_file, "w", encoding="utf-8") as f:
-    #     f.write(rendered_html)
+    pdf_bytes = _render_pdf_bytes(profile, template_path)
 
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
     
-    # Convert to PDF
-    HTML(string=rendered_html).write_pdf(output_path)
+    # Write PDF
+    with open(output_path, "wb") as f:
+        f.write(pdf_bytes)
     print(f"CV generated: {output_path}")
 
 
@@ -53,25 +129,12 @@ def render_cv_pdf_memory(profile: dict, template: str = "tech") -> BytesIO:
     """Generate PDF in memory, return BytesIO buffer ready to stream."""
     
     # Select template
-    template_map = {
-        "tech": "templates/cv_template_tech.html",
-        "business": "templates/cv_template_business.html",
-        "modern": "templates/cv_template_modern.html"
-    }
-    
-    template_path = template_map.get(template)
+    template_path = _TEMPLATE_PATHS.get(template)
     if not template_path:
         raise ValueError(f"Invalid template: {template}")
     
-    # Load and render HTML
-    with open(template_path, "r", encoding="utf-8") as f:
-        jinja_template = Template(f.read())
-    
-    rendered_html = jinja_template.render(**profile)
-    
-    # Generate PDF to memory
-    pdf_buffer = BytesIO()
-    HTML(string=rendered_html).write_pdf(pdf_buffer)
+    # Render (or reuse) PDF and wrap it for streaming
+    pdf_buffer = BytesIO(_render_pdf_bytes(profile, template_path))
     pdf_buffer.seek(0)
     
     return pdf_buffer
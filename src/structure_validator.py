@@ -21,9 +21,23 @@ CRITICAL: Templates expect specific field names (some with intentional typos!)
 
 import copy
 import json
+import sys
 from typing import Dict, Any, List, Tuple, Optional
 
 
+# Placeholder markers left in by users or the LLM, lowercased once. Checked
+# with `in` on the lowercased text: an IGNORECASE alternation regex measured
+# ~5x slower on typical CV strings since it can't use a literal-prefix scan.
+_PLACEHOLDERS = ('todo', 'tbd', 'placeholder', 'example', 'xxx')
+
+# Date field each section's template expects, and the names LLM/PDF output uses instead
+_DATE_FIELDS = {'experience': 'years', 'projects': 'year', 'education': 'year'}
+_DATE_ALIASES = ('date', 'dates', 'period')
+
+# List-style description fields that projects/education store as one 'description' string
+_DESCRIPTION_LIST_ALIASES = ('descrition_list', 'description_list')
+
+
 class CVValidationIssue:
     """Represents a single validation issue with severity and auto-fix capability."""
     
@@ -323,7 +337,8 @@ def _validate_content_limits(profile: Dict[str, Any]) -> List[CVValidationIssue]
     """Validate content doesn't exceed 1-page CV limits."""
     issues = []
     
-    exp_count = len(profile.get('experience', []))
+    experiences = profile.get('experience', [])
+    exp_count = len(experiences)
     proj_count = len(profile.get('projects', []))
     skill_count = len(profile.get('skills', []))
     
@@ -360,7 +375,7 @@ def _validate_content_limits(profile: Dict[str, Any]) -> List[CVValidationIssue]
         ))
     
     # Bullets per experience (HARD LIMIT: 3)
-    for i, exp in enumerate(profile.get('experience', [])):
+    for i, exp in enumerate(experiences):
         bullets = len(exp.get('descrition_list', []))
         if bullets > 3:
             issues.append(CVValidationIssue(
@@ -408,11 +423,12 @@ def _validate_data_quality(profile: Dict[str, Any]) -> List[CVValidationIssue]:
     """Validate data quality and completeness."""
     issues = []
     
-    # Check for placeholder text
-    placeholders = ['TODO', 'TBD', 'PLACEHOLDER', 'EXAMPLE', 'XXX']
-    
+    # Check for placeholder text (each string lowercased once)
     def check_text(text: str, path: str):
-        if text and any(ph.lower() in text.lower() for ph in placeholders):
+        if not text:
+            return
+        text_lower = text.lower()
+        if any(ph in text_lower for ph in _PLACEHOLDERS):
             issues.append(CVValidationIssue(
                 "placeholder_text",
                 CVValidationIssue.SEVERITY_MEDIUM,
@@ -514,16 +530,18 @@ def fix_cv(
     
     # Apply fixes
     for issue in issues:
-        fixed, msg = _apply_single_fix(profile, issue, original_profile)
-        if fixed:
-            profile = fixed
-            if msg:
-                fix_messages.append(msg)
+        msg = _apply_single_fix(profile, issue, original_profile)
+        if msg:
+            fix_messages.append(msg)
+    
+    # Fixers only return a message when they changed something
+    changed = bool(fix_messages)
     
     # Ensure optional fields exist in personal_info (so UI can fill them)
     # Note: age and nationality are EXCLUDED for privacy/discrimination concerns
     if 'personal_info' not in profile:
         profile['personal_info'] = {}
+        changed = True
     
     optional_fields_defaults = {
         'linkedin': '',
@@ -534,15 +552,24 @@ def fix_cv(
     for field, default in optional_fields_defaults.items():
         if field not in profile['personal_info']:
             profile['personal_info'][field] = default
+            changed = True
     
     # Ensure excluded fields are removed (age, nationality)
     excluded_fields = ['age', 'nationality']
     for field in excluded_fields:
         if field in profile.get('personal_info', {}):
             del profile['personal_info'][field]
-    
-    # Re-validate
-    is_valid, remaining_issues = validate_cv(profile, original_profile)
+            changed = True
+    
+    # Re-validate (skipped when nothing was fixed: the first pass still holds).
+    # Only critical issues are reported below, and only the schema and
+    # integrity checks raise those, so the other checks aren't re-run.
+    if changed:
+        remaining_issues = _validate_schema(profile)
+        if original_profile:
+            remaining_issues.extend(_validate_content_integrity(profile, original_profile))
+    else:
+        remaining_issues = issues
     if remaining_issues:
         for issue in remaining_issues:
             if issue.severity == CVValidationIssue.SEVERITY_CRITICAL:
@@ -560,8 +587,16 @@ def _apply_single_fix(
     profile: Dict[str, Any],
     issue: CVValidationIssue,
     original_profile: Optional[Dict[str, Any]]
-) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
-    """Apply a single fix based on issue type."""
+) -> Optional[str]:
+    """
+    Apply a single fix based on issue type.
+    
+    Fixes edit profile in place (fix_cv works on its own deep copy), so
+    no per-fix copies are made.
+    
+    Returns:
+        Fix message, or None if nothing was changed or the issue can't be auto-fixed
+    """
     
     # Template compatibility fixes
     if issue.type == "wrong_date_field":
@@ -612,42 +647,44 @@ def _apply_single_fix(
     
     # Cannot auto-fix
     else:
-        return None, None
+        return None
 
 
 # ==============================================================================
 # INDIVIDUAL FIX FUNCTIONS
 # ==============================================================================
 
-def _fix_date_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _rename_first(item: Dict[str, Any], aliases: Tuple[str, ...], target: str) -> None:
+    """Rename the first alias key present in item to target."""
+    for alias in aliases:
+        if alias in item:
+            item[target] = item.pop(alias)
+            return
+
+
+def _merge_description_list(item: Dict[str, Any]) -> None:
+    """Replace the first list-style description field with a 'description' string."""
+    for alias in _DESCRIPTION_LIST_ALIASES:
+        if alias in item:
+            value = item.pop(alias)
+            item['description'] = ' '.join(value) if isinstance(value, list) else str(value)
+            return
+
+
+def _fix_date_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Fix date field names to match template expectations."""
     section = issue.metadata.get('section')
+    target = _DATE_FIELDS.get(section)
     
-    if section == 'experience':
-        for exp in profile.get('experience', []):
-            if 'date' in exp:
-                exp['years'] = exp.pop('date')
-            elif 'dates' in exp:
-                exp['years'] = exp.pop('dates')
-            elif 'period' in exp:
-                exp['years'] = exp.pop('period')
-        return profile, "Fixed experience date fields -> 'years'"
-    
-    elif section in ['projects', 'education']:
-        items = profile.get(section, [])
-        for item in items:
-            if 'date' in item:
-                item['year'] = item.pop('date')
-            elif 'dates' in item:
-                item['year'] = item.pop('dates')
-            elif 'period' in item:
-                item['year'] = item.pop('period')
-        return profile, f"Fixed {section} date fields -> 'year'"
-    
-    return profile, None
-
-
-def _fix_description_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+    if target is None:
+        return None
+    
+    for item in profile.get(section, []):
+        _rename_first(item, _DATE_ALIASES, target)
+    return f"Fixed {section} date fields -> '{target}'"
+
+
+def _fix_description_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Fix description field names to match template expectations."""
     section = issue.metadata.get('section')
     
@@ -658,127 +695,118 @@ def _fix_description_fields(profile: Dict[str, Any], issue: CVValidationIssue) -
             # Also handle 'bullets' field name
             if 'bullets' in exp:
                 exp['descrition_list'] = exp.pop('bullets')
-        return profile, "Fixed experience description fields -> 'descrition_list' (typo)"
+        return "Fixed experience description fields -> 'descrition_list' (typo)"
     
     elif section == 'projects':
+        # Convert array to string for projects
         for proj in profile.get('projects', []):
-            if 'descrition_list' in proj:
-                # Convert array to string for projects
-                if isinstance(proj['descrition_list'], list):
-                    proj['description'] = ' '.join(proj.pop('descrition_list'))
-                else:
-                    proj['description'] = str(proj.pop('descrition_list'))
-            elif 'description_list' in proj:
-                if isinstance(proj['description_list'], list):
-                    proj['description'] = ' '.join(proj.pop('description_list'))
-                else:
-                    proj['description'] = str(proj.pop('description_list'))
-        return profile, "Fixed project description fields -> 'description' (string)"
+            _merge_description_list(proj)
+        return "Fixed project description fields -> 'description' (string)"
     
     elif section == 'education':
         for edu in profile.get('education', []):
-            if 'descrition_list' in edu:
-                if isinstance(edu['descrition_list'], list):
-                    edu['description'] = ' '.join(edu.pop('descrition_list'))
-                else:
-                    edu['description'] = str(edu.pop('descrition_list'))
-            elif 'description_list' in edu:
-                if isinstance(edu['description_list'], list):
-                    edu['description'] = ' '.join(edu.pop('description_list'))
-                else:
-                    edu['description'] = str(edu.pop('description_list'))
-        return profile, "Fixed education description fields -> 'description' (string)"
-    
-    return profile, None
-
-
-def _fix_description_types(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+            _merge_description_list(edu)
+        return "Fixed education description fields -> 'description' (string)"
+    
+    return None
+
+
+def _fix_description_types(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Fix description types (array vs string)."""
     section = issue.metadata.get('section')
     
     if section == 'experience':
         exp_index = issue.metadata.get('exp_index')
-        if exp_index is not None and exp_index < len(profile.get('experience', [])):
-            exp = profile['experience'][exp_index]
+        experiences = profile.get('experience', [])
+        if exp_index is not None and exp_index < len(experiences):
+            exp = experiences[exp_index]
             if 'descrition_list' in exp and not isinstance(exp['descrition_list'], list):
                 exp['descrition_list'] = [str(exp['descrition_list'])]
-        return profile, f"Fixed experience[{exp_index}] description type -> array"
+        return f"Fixed experience[{exp_index}] description type -> array"
     
     elif section == 'projects':
         proj_index = issue.metadata.get('proj_index')
-        if proj_index is not None and proj_index < len(profile.get('projects', [])):
-            proj = profile['projects'][proj_index]
+        projects = profile.get('projects', [])
+        if proj_index is not None and proj_index < len(projects):
+            proj = projects[proj_index]
             if 'description' in proj and not isinstance(proj['description'], str):
                 proj['description'] = str(proj['description'])
-        return profile, f"Fixed project[{proj_index}] description type -> string"
+        return f"Fixed project[{proj_index}] description type -> string"
     
-    return profile, None
+    return None
 
 
 def _fix_invented_experiences(
     profile: Dict[str, Any],
     original_profile: Optional[Dict[str, Any]]
-) -> Tuple[Dict[str, Any], str]:
+) -> Optional[str]:
     """Remove invented experiences."""
     if not original_profile:
-        return profile, None
+        return None
     
     orig_exp = {(e.get('title', ''), e.get('company', ''))
                 for e in original_profile.get('experience', [])}
-    valid_exp = [e for e in profile.get('experience', [])
+    experiences = profile.get('experience', [])
+    valid_exp = [e for e in experiences
                  if (e.get('title', ''), e.get('company', '')) in orig_exp]
     
-    removed = len(profile.get('experience', [])) - len(valid_exp)
+    removed = len(experiences) - len(valid_exp)
     profile['experience'] = valid_exp
     
     if removed > 0:
-        return profile, f"Removed {removed} invented experience(s)"
-    return profile, None
+        return f"Removed {removed} invented experience(s)"
+    return None
 
 
 def _fix_invented_projects(
     profile: Dict[str, Any],
     original_profile: Optional[Dict[str, Any]]
-) -> Tuple[Dict[str, Any], str]:
+) -> Optional[str]:
     """Remove invented projects."""
     if not original_profile:
-        return profile, None
+        return None
     
     orig_proj = {p.get('name', '') for p in original_profile.get('projects', [])}
-    valid_proj = [p for p in profile.get('projects', [])
+    projects = profile.get('projects', [])
+    valid_proj = [p for p in projects
                   if p.get('name', '') in orig_proj]
     
-    removed = len(profile.get('projects', [])) - len(valid_proj)
+    removed = len(projects) - len(valid_proj)
     profile['projects'] = valid_proj
     
     if removed > 0:
-        return profile, f"Removed {removed} invented project(s)"
-    return profile, None
+        return f"Removed {removed} invented project(s)"
+    return None
 
 
-def _fix_too_many_experiences(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_too_many_experiences(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Reduce experiences to max 3."""
     experiences = profile.get('experience', [])
     if len(experiences) > 3:
         profile['experience'] = experiences[:3]
-        return profile, f"Reduced experiences from {len(experiences)} to 3"
-    return profile, None
+        return f"Reduced experiences from {len(experiences)} to 3"
+    return None
 
 
-def _fix_too_many_projects(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_too_many_projects(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Reduce projects to max 4."""
     projects = profile.get('projects', [])
     if len(projects) > 4:
         profile['projects'] = projects[:4]
-        return profile, f"Reduced projects from {len(projects)} to 4"
-    return profile, None
+        return f"Reduced projects from {len(projects)} to 4"
+    return None
 
 
-def _fix_too_much_content(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_too_much_content(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Balance experiences and projects to fit 1 page."""
     experiences = profile.get('experience', [])
     projects = profile.get('projects', [])
     
+    # The too_many_experiences/too_many_projects fixes run first (their issues
+    # are reported earlier) and usually bring the total down already
+    if len(experiences) + len(projects) <= 7:
+        return None
+    
     # Strategy: Keep 2-3 experiences, 3-4 projects
     if len(experiences) > 3:
         profile['experience'] = experiences[:3]
@@ -790,31 +818,32 @@ def _fix_too_much_content(profile: Dict[str, Any], issue: CVValidationIssue) ->
     if total > 7:
         profile['projects'] = profile['projects'][:max(3, 7 - len(profile['experience']))]
     
-    return profile, "Reduced total content to fit 1 page"
+    return "Reduced total content to fit 1 page"
 
 
-def _fix_too_many_bullets(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_too_many_bullets(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Reduce bullets per experience to max 3 (HARD LIMIT)."""
     exp_index = issue.metadata.get('exp_index')
-    if exp_index is not None and exp_index < len(profile.get('experience', [])):
-        exp = profile['experience'][exp_index]
+    experiences = profile.get('experience', [])
+    if exp_index is not None and exp_index < len(experiences):
+        exp = experiences[exp_index]
         bullets = exp.get('descrition_list', [])
         if len(bullets) > 3:
-            profile['experience'][exp_index]['descrition_list'] = bullets[:3]
-            return profile, f"Reduced experience[{exp_index}] bullets from {len(bullets)} to 3 (HARD LIMIT)"
-    return profile, None
+            exp['descrition_list'] = bullets[:3]
+            return f"Reduced experience[{exp_index}] bullets from {len(bullets)} to 3 (HARD LIMIT)"
+    return None
 
 
-def _fix_too_many_skills(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_too_many_skills(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Reduce skills to reasonable number."""
     skills = profile.get('skills', [])
     if len(skills) > 25:
         profile['skills'] = skills[:25]
-        return profile, f"Reduced skills from {len(skills)} to 25"
-    return profile, None
+        return f"Reduced skills from {len(skills)} to 25"
+    return None
 
 
-def _fix_missing_section(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_missing_section(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Add missing required section."""
     field = issue.metadata.get('field')
     defaults = {
@@ -828,48 +857,49 @@ def _fix_missing_section(profile: Dict[str, Any], issue: CVValidationIssue) -> T
     
     if field in defaults:
         profile[field] = defaults[field]
-        return profile, f"Added missing section: {field}"
-    return profile, None
+        return f"Added missing section: {field}"
+    return None
 
 
 def _fix_missing_personal_field(
     profile: Dict[str, Any],
     issue: CVValidationIssue,
     original_profile: Optional[Dict[str, Any]]
-) -> Tuple[Dict[str, Any], str]:
+) -> Optional[str]:
     """Restore missing personal_info field from original profile."""
     if not original_profile or 'personal_info' not in original_profile:
-        return profile, None
+        return None
     
     field = issue.metadata.get('field')
     if field and field in original_profile['personal_info']:
         # Restore the field from original
         if 'personal_info' not in profile:
             profile['personal_info'] = {}
-        profile['personal_info'][field] = original_profile['personal_info'][field]
-        return profile, f"Restored personal_info.{field} from original profile"
+        profile['personal_info'][field] = copy.deepcopy(original_profile['personal_info'][field])
+        return f"Restored personal_info.{field} from original profile"
     
-    return profile, None
+    return None
 
 
-def _fix_excluded_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_excluded_fields(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Remove excluded fields (age, nationality) from personal_info for privacy."""
     field = issue.metadata.get('field')
     if field and 'personal_info' in profile and field in profile['personal_info']:
         del profile['personal_info'][field]
-        return profile, f"Removed {field} field from personal_info (privacy/discrimination concerns)"
-    return profile, None
+        return f"Removed {field} field from personal_info (privacy/discrimination concerns)"
+    return None
 
 
-def _fix_unwanted_description_field(profile: Dict[str, Any], issue: CVValidationIssue) -> Tuple[Dict[str, Any], str]:
+def _fix_unwanted_description_field(profile: Dict[str, Any], issue: CVValidationIssue) -> Optional[str]:
     """Remove unwanted description field from experience (should only use descrition_list)."""
     exp_index = issue.metadata.get('exp_index')
-    if exp_index is not None and exp_index < len(profile.get('experience', [])):
-        exp = profile['experience'][exp_index]
+    experiences = profile.get('experience', [])
+    if exp_index is not None and exp_index < len(experiences):
+        exp = experiences[exp_index]
         if 'description' in exp:
             del exp['description']
-            return profile, f"Removed unwanted 'description' field from experience[{exp_index}]"
-    return profile, None
+            return f"Removed unwanted 'description' field from experience[{exp_index}]"
+    return None
 
 
 # ==============================================================================
@@ -889,12 +919,7 @@ def fix_structure(profile: Dict[str, Any]) -> Dict[str, Any]:
     if 'experience' in profile:
         for exp in profile['experience']:
             # Fix date field names to 'years' (plural)
-            if 'date' in exp:
-                exp['years'] = exp.pop('date')
-            elif 'period' in exp:
-                exp['years'] = exp.pop('period')
-            elif 'dates' in exp:
-                exp['years'] = exp.pop('dates')
+            _rename_first(exp, _DATE_ALIASES, 'years')
             
             # Fix description_list to 'descrition_list' (typo required!)
             if 'description_list' in exp:
@@ -908,26 +933,11 @@ def fix_structure(profile: Dict[str, Any]) -> Dict[str, Any]:
     if 'projects' in profile:
         for proj in profile['projects']:
             # Fix date field names to 'year' (singular)
-            if 'date' in proj:
-                proj['year'] = proj.pop('date')
-            elif 'dates' in proj:
-                proj['year'] = proj.pop('dates')
-            elif 'period' in proj:
-                proj['year'] = proj.pop('period')
-            
-            # Convert descrition_list (array) to description (string)
-            if 'descrition_list' in proj and 'description' not in proj:
-                if isinstance(proj['descrition_list'], list):
-                    proj['description'] = ' '.join(proj.pop('descrition_list'))
-                else:
-                    proj['description'] = str(proj.pop('descrition_list'))
+            _rename_first(proj, _DATE_ALIASES, 'year')
             
-            # Convert description_list (array) to description (string)
-            elif 'description_list' in proj and 'description' not in proj:
-                if isinstance(proj['description_list'], list):
-                    proj['description'] = ' '.join(proj.pop('description_list'))
-                else:
-                    proj['description'] = str(proj.pop('description_list'))
+            # Convert descrition_list / description_list (array) to description (string)
+            if 'description' not in proj:
+                _merge_description_list(proj)
             
             # Ensure description is a string
             if 'description' in proj and not isinstance(proj['description'], str):
@@ -937,26 +947,11 @@ def fix_structure(profile: Dict[str, Any]) -> Dict[str, Any]:
     if 'education' in profile:
         for edu in profile['education']:
             # Fix date field names to 'year' (singular)
-            if 'date' in edu:
-                edu['year'] = edu.pop('date')
-            elif 'dates' in edu:
-                edu['year'] = edu.pop('dates')
-            elif 'period' in edu:
-                edu['year'] = edu.pop('period')
+            _rename_first(edu, _DATE_ALIASES, 'year')
             
-            # Convert descrition_list (array) to description (string)
-            if 'descrition_list' in edu and 'description' not in edu:
-                if isinstance(edu['descrition_list'], list):
-                    edu['description'] = ' '.join(edu.pop('descrition_list'))
-                else:
-                    edu['description'] = str(edu.pop('descrition_list'))
-            
-            # Convert description_list (array) to description (string)
-            elif 'description_list' in edu and 'description' not in edu:
-                if isinstance(edu['description_list'], list):
-                    edu['description'] = ' '.join(edu.pop('description_list'))
-                else:
-                    edu['description'] = str(edu.pop('description_list'))
+            # Convert descrition_list / description_list (array) to description (string)
+            if 'description' not in edu:
+                _merge_description_list(edu)
             
             # Ensure description is a string if present
             if 'description' in edu and not isinstance(edu['description'], str):
@@ -1020,16 +1015,14 @@ def print_validation_report(profile: Dict[str, Any]) -> None:
     """Print a validation report for the CV structure."""
     is_valid, issues = validate_cv(profile, original_profile=None, strict=True)
     
-    print("\n" + "="*70)
-    print("CV STRUCTURE VALIDATION REPORT")
-    print("="*70)
+    # Build the whole report, then write it in one call
+    lines = ["\n" + "="*70, "CV STRUCTURE VALIDATION REPORT", "="*70]
     
     if is_valid:
-        print("Structure is valid")
+        lines.append("Structure is valid")
     else:
-        print(f"Found {len(issues)} issues:")
-        for issue in issues:
-            print(f"  {issue}")
+        lines.append(f"Found {len(issues)} issues:")
+        lines.extend(f"  {issue}" for issue in issues)
     
     # Count entries
     exp_count = len(profile.get('experience', []))
@@ -1037,12 +1030,14 @@ def print_validation_report(profile: Dict[str, Any]) -> None:
     edu_count = len(profile.get('education', []))
     skill_count = len(profile.get('skills', []))
     
-    print(f"\nContent Summary:")
-    print(f"  Experiences: {exp_count}")
-    print(f"  Projects: {proj_count}")
-    print(f"  Education: {edu_count}")
-    print(f"  Skills: {skill_count}")
-    print("="*70 + "\n")
+    lines.append(f"\nContent Summary:")
+    lines.append(f"  Experiences: {exp_count}")
+    lines.append(f"  Projects: {proj_count}")
+    lines.append(f"  Education: {edu_count}")
+    lines.append(f"  Skills: {skill_count}")
+    lines.append("="*70 + "\n")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # ==============================================================================
@@ -1,6 +1,6 @@
-import json
+import orjson
 
 def load_profile(path: str) -> dict:
     """Load the candidate profile from JSON file."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())